@@ -1,5 +1,6 @@
 from typing import Dict, Any, Optional
 from .llm_service import LLMService
+from .transcript_store import TranscriptStore
 from langchain_openai import ChatOpenAI
 import json
 
@@ -35,14 +36,15 @@ class IntentService(LLMService):
     }}
     """
 
-    def __init__(self, llm: Optional[ChatOpenAI] = None):
+    def __init__(self, llm: Optional[ChatOpenAI] = None, transcript_store: Optional[TranscriptStore] = None):
         """初始化意图服务
         
         Args:
             llm: LLM模型实例
+            transcript_store: LLM调用记录存储（录制/回放/缓存）
         """
         # 调用父类初始化
-        super().__init__(llm)
+        super().__init__(llm, transcript_store=transcript_store)
         
         # 创建意图Chain
         self.intent_chain = self.create_chain(self.INTENT_PROMPT)
@@ -5,6 +5,8 @@ from langchain_openai import ChatOpenAI
 from langchain.schema.runnable import RunnablePassthrough
 from operator import itemgetter
 import json
+import time
+from .transcript_store import TranscriptStore, TranscriptMode
 
 # 默认配置
 LLM_MODEL = "gpt-4o"
@@ -16,17 +18,29 @@ def log_message(message: str, level: str = "INFO"):
     print(f"[{level}] {message}")
 
 class LLMService:
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, model: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, model: Optional[str] = None,
+                 transcript_store: Optional[TranscriptStore] = None):
         """初始化LLM服务
         
         Args:
             api_key: OpenAI API密钥，如果不提供则从环境变量获取
             base_url: API基础URL，如果不提供则使用默认值
             model: 模型名称，如果不提供则使用默认值
+            transcript_store: LLM调用记录存储，如果不提供则根据 NPC_TRANSCRIPT_* 环境变量创建
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY", LLM_API_KEY)
         self.base_url = base_url or LLM_BASE_URL
         self.model = model or LLM_MODEL
+        self.transcript_store = transcript_store if transcript_store is not None else TranscriptStore.from_env()
+        
+        # 纯回放模式不会访问真实LLM，无需API密钥
+        if self.transcript_store is not None and self.transcript_store.mode == TranscriptMode.REPLAY:
+            self.llm = None
+            log_message(f"已初始化 LLMService（回放模式），记录文件: {self.transcript_store.path}，"
+                        f"共 {self.transcript_store.count()} 条记录", "INFO")
+            if self.transcript_store.count() == 0:
+                log_message(f"回放记录为空，所有请求都将返回错误: {self.transcript_store.path}", "WARNING")
+            return
         
         if not self.api_key:
             raise ValueError("未提供 API 密钥，请通过参数传入或设置 OPENAI_API_KEY 环境变量")
@@ -38,6 +52,9 @@ class LLMService:
         )
         
         log_message(f"已初始化 LLMService，使用模型: {self.model}", "INFO")
+        if self.transcript_store is not None:
+            log_message(f"LLM调用记录已启用（{self.transcript_store.mode.value}），记录文件: {self.transcript_store.path}，"
+                        f"共 {self.transcript_store.count()} 条记录", "INFO")
     
     def create_chain(self, prompt_template: str):
         """创建处理链
@@ -50,10 +67,13 @@ class LLMService:
         """
         prompt = ChatPromptTemplate.from_template(prompt_template)
         
-        # 创建基本的处理链
-        chain = (
-            RunnablePassthrough() | prompt | self.llm
-        )
+        # 创建基本的处理链（回放模式下没有LLM，只保留提示部分用于计算指纹）
+        if self.llm is None:
+            chain = RunnablePassthrough() | prompt
+        else:
+            chain = (
+                RunnablePassthrough() | prompt | self.llm
+            )
         
         return chain
     
@@ -86,6 +106,55 @@ class LLMService:
             print(f"JSON解析失败: {e}")
             print(f"原始字符串: {json_str}")
             return {}
+
+    @staticmethod
+    def render_prompt(chain, inputs: Dict[str, Any]) -> str:
+        """渲染处理链中的提示文本，用于计算请求指纹
+        
+        Args:
+            chain: Runnable chain实例
+            inputs: 输入参数字典
+            
+        Returns:
+            渲染后的提示文本；找不到提示模板时返回输入参数的JSON
+        """
+        for step in getattr(chain, 'steps', []):
+            if isinstance(step, ChatPromptTemplate):
+                return step.format(**inputs)
+        return json.dumps(inputs, ensure_ascii=False, sort_keys=True, default=str)
+
+    async def _invoke_with_transcript(self, chain, inputs: Dict[str, Any]) -> Any:
+        """经由调用记录存储执行处理链
+        
+        Args:
+            chain: Runnable chain实例
+            inputs: 输入参数字典
+            
+        Returns:
+            LLM原始返回（回放或缓存命中时为录制的文本）
+        """
+        store = self.transcript_store
+        fingerprint = store.fingerprint(self.model, self.render_prompt(chain, inputs))
+        
+        if store.serves_from_store:
+            record = store.lookup(fingerprint)
+            if record is not None:
+                await store.wait_recorded_latency(record)
+                return record["completion"]
+            if store.mode == TranscriptMode.REPLAY:
+                raise LookupError(f"调用记录中没有匹配的请求: {fingerprint}")
+        
+        start = time.perf_counter()
+        result = await chain.ainvoke(inputs)
+        latency = time.perf_counter() - start
+        
+        completion = result.content if hasattr(result, 'content') else result
+        if store.writes_to_store:
+            if isinstance(completion, str):
+                store.append(fingerprint, self.model, completion, latency)
+            else:
+                log_message(f"LLM返回不是文本（{type(completion).__name__}），未写入调用记录: {fingerprint}", "WARNING")
+        return completion
             
     async def generate_response(self, chain, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """生成响应
@@ -98,11 +167,15 @@ class LLMService:
             处理后的响应字典
         """
         try:
-            result = await chain.ainvoke(inputs)
-            
-            # 如果结果是 AIMessage 对象，获取其内容
-            if hasattr(result, 'content'):
-                result = result.content
+            if self.transcript_store is not None:
+                # 已在 _invoke_with_transcript 中取出 AIMessage 内容
+                result = await self._invoke_with_transcript(chain, inputs)
+            else:
+                result = await chain.ainvoke(inputs)
+                
+                # 如果结果是 AIMessage 对象，获取其内容
+                if hasattr(result, 'content'):
+                    result = result.content
             
             # 如果输出是字符串，尝试解析JSON
             if isinstance(result, str):
@@ -0,0 +1,151 @@
+from enum import Enum
+from typing import Dict, List, Any, Optional
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+# 默认配置
+TRANSCRIPT_PATH = "transcripts/llm_transcripts.jsonl"
+TRANSCRIPT_SPEED = 1.0  # 回放倍速，0 表示不等待
+
+class TranscriptMode(Enum):
+    RECORD = "record"    # 调用真实LLM，并把每次补全写入记录
+    REPLAY = "replay"    # 只从记录中返回结果，不调用LLM
+    CACHE = "cache"      # 命中则直接返回，未命中则调用LLM并写回记录
+
+class TranscriptStore:
+    """LLM调用记录存储
+
+    以 JSONL 追加写入磁盘，每行一条记录：
+        {"fingerprint": ..., "model": ..., "completion": ..., "latency": ..., "recorded_at": ...}
+    启动时读入全部记录并按请求指纹建立内存索引。
+    """
+
+    def __init__(self, path: str = TRANSCRIPT_PATH, mode: TranscriptMode = TranscriptMode.REPLAY, speed: float = TRANSCRIPT_SPEED):
+        """初始化记录存储
+
+        Args:
+            path: 记录文件路径
+            mode: 工作模式（record/replay/cache）
+            speed: 回放倍速，1.0 按录制耗时等待，0 表示立即返回
+        """
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self._index: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> Optional["TranscriptStore"]:
+        """从环境变量创建记录存储，未设置 NPC_TRANSCRIPT_MODE 时返回 None
+
+        环境变量：
+            NPC_TRANSCRIPT_MODE: record / replay / cache
+            NPC_TRANSCRIPT_PATH: 记录文件路径
+            NPC_TRANSCRIPT_SPEED: 回放倍速
+        """
+        mode = os.getenv("NPC_TRANSCRIPT_MODE")
+        if not mode:
+            return None
+        return cls(
+            path=os.getenv("NPC_TRANSCRIPT_PATH", TRANSCRIPT_PATH),
+            mode=TranscriptMode(mode.lower()),
+            speed=float(os.getenv("NPC_TRANSCRIPT_SPEED", TRANSCRIPT_SPEED))
+        )
+
+    @staticmethod
+    def fingerprint(model: str, prompt: str) -> str:
+        """计算请求指纹
+
+        Args:
+            model: 模型名称
+            prompt: 渲染后的完整提示文本
+
+        Returns:
+            sha256 十六进制字符串
+        """
+        return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def _load(self) -> None:
+        """读取已有记录并建立索引"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                # 进程中断可能留下半行，缺少必要字段的记录同样跳过
+                if not isinstance(record, dict) or "fingerprint" not in record or "completion" not in record:
+                    print(f"跳过损坏的记录: {self.path}:{line_no}")
+                    continue
+                self._index.setdefault(record["fingerprint"], []).append(record)
+
+    def count(self) -> int:
+        """返回记录总数"""
+        return sum(len(records) for records in self._index.values())
+
+    @property
+    def serves_from_store(self) -> bool:
+        """当前模式是否优先从记录返回结果"""
+        return self.mode in (TranscriptMode.REPLAY, TranscriptMode.CACHE)
+
+    @property
+    def writes_to_store(self) -> bool:
+        """当前模式是否把真实调用写入记录"""
+        return self.mode in (TranscriptMode.RECORD, TranscriptMode.CACHE)
+
+    def lookup(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """按指纹查找记录
+
+        同一指纹录到多条时按录制顺序依次返回，用完后重复最后一条。
+
+        Returns:
+            记录字典，未命中时返回 None
+        """
+        records = self._index.get(fingerprint)
+        if not records:
+            return None
+        cursor = self._cursors.get(fingerprint, 0)
+        self._cursors[fingerprint] = cursor + 1
+        return records[min(cursor, len(records) - 1)]
+
+    def append(self, fingerprint: str, model: str, completion: str, latency: float) -> Dict[str, Any]:
+        """追加一条记录并写入磁盘
+
+        Args:
+            fingerprint: 请求指纹
+            model: 模型名称
+            completion: LLM 原始返回文本
+            latency: 调用耗时（秒）
+
+        Returns:
+            写入的记录
+        """
+        record = {
+            "fingerprint": fingerprint,
+            "model": model,
+            "completion": completion,
+            "latency": latency,
+            "recorded_at": time.time()
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._index.setdefault(fingerprint, []).append(record)
+        return record
+
+    async def wait_recorded_latency(self, record: Dict[str, Any]) -> None:
+        """按回放倍速等待录制时的耗时（仅 replay 模式）"""
+        if self.mode != TranscriptMode.REPLAY or not self.speed:
+            return
+        await asyncio.sleep(record.get("latency", 0) / self.speed)
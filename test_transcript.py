@@ -0,0 +1,107 @@
+import asyncio
+import os
+import tempfile
+from langchain_core.language_models import FakeListChatModel
+from core.llm_service import LLMService
+from core.transcript_store import TranscriptStore, TranscriptMode
+
+# 离线测试：用 FakeListChatModel 代替真实LLM，不需要 API 密钥和网络
+
+TEMPLATE = "玩家说: {content}"
+
+def make_live_service(store: TranscriptStore, responses) -> LLMService:
+    """创建使用假模型的LLM服务"""
+    service = LLMService(api_key="offline-test", transcript_store=store)
+    service.llm = FakeListChatModel(responses=responses)
+    return service
+
+async def _record_then_replay(path: str):
+    # 在全新的空文件上录制
+    recorder = make_live_service(
+        TranscriptStore(path, TranscriptMode.RECORD),
+        ['{"content": "第一次"}', '{"content": "第二次"}', '{"content": "别的"}']
+    )
+    chain = recorder.create_chain(TEMPLATE)
+    recorded = [
+        await recorder.generate_response(chain, {"content": "你好"}),
+        await recorder.generate_response(chain, {"content": "你好"}),
+        await recorder.generate_response(chain, {"content": "再见"}),
+    ]
+    assert recorded == [{"content": "第一次"}, {"content": "第二次"}, {"content": "别的"}], recorded
+    assert os.path.exists(path)
+
+    # 回放：不需要API密钥，结果与录制一致，同一请求按录制顺序返回
+    replayer = LLMService(transcript_store=TranscriptStore(path, TranscriptMode.REPLAY, speed=0))
+    assert replayer.llm is None
+    assert replayer.transcript_store.count() == 3
+    chain = replayer.create_chain(TEMPLATE)
+    replayed = [
+        await replayer.generate_response(chain, {"content": "你好"}),
+        await replayer.generate_response(chain, {"content": "你好"}),
+        await replayer.generate_response(chain, {"content": "再见"}),
+    ]
+    assert replayed == recorded, replayed
+
+    # 记录用完后重复最后一条
+    assert await replayer.generate_response(chain, {"content": "你好"}) == {"content": "第二次"}
+
+    # 未命中时返回错误，而不是调用真实LLM
+    missed = await replayer.generate_response(chain, {"content": "没录过"})
+    assert "error" in missed, missed
+
+async def _replay_empty_store(path: str):
+    # 空记录的回放也不能回退到真实调用
+    replayer = LLMService(api_key="offline-test", transcript_store=TranscriptStore(path, TranscriptMode.REPLAY))
+    assert replayer.llm is None
+    chain = replayer.create_chain(TEMPLATE)
+    result = await replayer.generate_response(chain, {"content": "你好"})
+    assert "error" in result, result
+
+async def _cache_write_back(path: str):
+    # 空文件上的缓存：未命中调用LLM并写回，命中时不再调用
+    cached = make_live_service(TranscriptStore(path, TranscriptMode.CACHE), ['{"content": "缓存"}'])
+    chain = cached.create_chain(TEMPLATE)
+    assert await cached.generate_response(chain, {"content": "你好"}) == {"content": "缓存"}
+    assert cached.transcript_store.count() == 1
+
+    # 换成无法解析的回复，确认命中时走的是缓存而不是LLM
+    cached.llm = FakeListChatModel(responses=["不是JSON"])
+    chain = cached.create_chain(TEMPLATE)
+    assert await cached.generate_response(chain, {"content": "你好"}) == {"content": "缓存"}
+    assert cached.transcript_store.count() == 1
+
+    # 重新启动后从磁盘预热
+    warm = TranscriptStore(path, TranscriptMode.CACHE)
+    assert warm.count() == 1
+
+def _skip_bad_lines(path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"fingerprint": "abc", "completion": "{}"}\n')
+        f.write('{"model": "gpt-4o"}\n')
+        f.write('{"fingerprint": "trunc\n')
+    store = TranscriptStore(path, TranscriptMode.REPLAY)
+    assert store.count() == 1
+    assert store.lookup("abc")["completion"] == "{}"
+
+def test_record_then_replay():
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_record_then_replay(os.path.join(tmp, "new", "transcripts.jsonl")))
+
+def test_replay_empty_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_replay_empty_store(os.path.join(tmp, "missing.jsonl")))
+
+def test_cache_write_back():
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_cache_write_back(os.path.join(tmp, "cache.jsonl")))
+
+def test_skip_bad_lines():
+    with tempfile.TemporaryDirectory() as tmp:
+        _skip_bad_lines(os.path.join(tmp, "bad.jsonl"))
+
+if __name__ == "__main__":
+    test_record_then_replay()
+    test_replay_empty_store()
+    test_cache_write_back()
+    test_skip_bad_lines()
+    print("全部通过")